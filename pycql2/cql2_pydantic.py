@@ -1,26 +1,45 @@
 from __future__ import annotations
 
+from abc import abstractmethod
 from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter
 from typing import (
     Any,
-    List,
+    Callable,
+    Dict,
     Literal,
-    MutableSequence,
+    Optional,
     Tuple,
     Union,
+    get_args,
 )
 
-from geojson_pydantic.geometries import Geometry, GeometryCollection
+from geojson_pydantic.geometries import (
+    Geometry,
+    GeometryCollection,
+    LineString,
+    MultiLineString,
+    MultiPoint,
+    MultiPolygon,
+    Point,
+    Polygon,
+)
 from geojson_pydantic.types import BBox
 from pydantic import (
+    AfterValidator,
     BaseModel,
+    ConfigDict,
+    Discriminator,
     Field,
     RootModel,
     StrictBool,
     StrictFloat,
     StrictInt,
     StrictStr,
+    Tag,
 )
+from pydantic_core import PydanticCustomError
 from typing_extensions import Annotated
 
 from pycql2.utils import _join_list, _make_char_literal
@@ -29,53 +48,163 @@ from pycql2.utils import _join_list, _make_char_literal
 # in places we want to have numbers.
 StrictFloatOrInt = Union[StrictFloat, StrictInt]
 
+_GEOMETRY_TYPES = (
+    Point,
+    MultiPoint,
+    LineString,
+    MultiLineString,
+    Polygon,
+    MultiPolygon,
+    GeometryCollection,
+)
 
-class NotExpression(BaseModel):
-    op: Literal["not"]
-    args: Tuple[BooleanExpression]
+
+def _render_datetime(value: datetime) -> str:
+    # Format it as iso with `Z` at the end. Note this will always include the
+    # microseconds, even if they are 0. The tzinfo is dropped so `isoformat` doesn't
+    # add an offset.
+    return f"'{value.replace(tzinfo=None).isoformat(timespec='microseconds')}Z'"
+
+
+def _render_date(value: date) -> str:
+    return f"'{value.isoformat()}'"
+
+
+# Renderers for the exact type of each value. Looking up `type(value)` avoids a
+# chain of `isinstance` checks, and keeps `bool` apart from `int` and `datetime`
+# apart from `date`. The models are added once they are defined.
+_RENDERERS: Dict[type, Callable[[Any], str]] = {
+    bool: lambda value: "TRUE" if value else "FALSE",
+    # Strings (including `..` in intervals) are Character Literals.
+    str: _make_char_literal,
+    int: str,
+    float: str,
+    datetime: _render_datetime,
+    date: _render_date,
+    **dict.fromkeys(_GEOMETRY_TYPES, attrgetter("wkt")),
+}
+
+
+def _render(value: Any) -> str:
+    """Render a value within an expression as cql2-text.
+
+    Models render themselves with `__str__`, but the plain values they contain need
+    to be converted to their cql2-text representation.
+    """
+    renderer = _RENDERERS.get(type(value))
+    if renderer is not None:
+        return renderer(value)
+    # Anything else, such as the root models or a subclass of another type, falls
+    # back to the slower checks. Pydantic keeps subclasses of `datetime` and `date`,
+    # such as those from freezegun or pandas, so they need the same formatting.
+    if isinstance(value, _ImmutableModel):
+        return value._text
+    # bool is a subclass of int and datetime is a subclass of date, so they must be
+    # checked first.
+    for base in (bool, str, datetime, date):
+        if isinstance(value, base):
+            return _RENDERERS[base](value)
+    if isinstance(value, _GEOMETRY_TYPES):
+        return value.wkt
+    return str(value)
+
+
+def _render_call(name: str, arg0: Any, arg1: Any) -> str:
+    """Render a two argument call such as `S_INTERSECTS(a, b)`."""
+    return name + "(" + _render(arg0) + ", " + _render(arg1) + ")"
+
+
+class _ImmutableModel(BaseModel):
+    """Base for models which are immutable once validated.
+
+    Their cql2-text is built by `_to_text` on first use and cached on the instance,
+    so rendering a tree again only joins the cached text of its children. Sequences
+    within them are tuples, so the cached text cannot go stale. GeoJSON geometries
+    come from `geojson-pydantic` and are not frozen, they should not be modified
+    in place either.
+    """
+
+    # The cache is a slot rather than an entry in `__dict__`, so it does not take
+    # part in equality, hashing or serialization, and copies start without it.
+    __slots__ = ("_text_cache",)
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    @property
+    def _text(self) -> str:
+        try:
+            text: str = object.__getattribute__(self, "_text_cache")
+        except AttributeError:
+            text = self._to_text()
+            # Bypass the frozen `__setattr__`.
+            object.__setattr__(self, "_text_cache", text)
+        return text
+
+    @abstractmethod
+    def _to_text(self) -> str:
+        """Build the cql2-text of the model."""
 
     def __str__(self) -> str:
-        return f"NOT {self.args[0]}"
+        return self._text
 
 
-class BinaryComparisonPredicate(BaseModel):
-    op: Literal["=", "<>", "<", "<=", ">", ">="]
+class NotExpression(_ImmutableModel):
+    op: Literal["not"]
+    args: Tuple[BooleanExpressionItems]
+
+    def _to_text(self) -> str:
+        return f"NOT {_render(self.args[0])}"
+
+
+BinaryComparisonOperator = Literal["=", "<>", "<", "<=", ">", ">="]
+
+
+class BinaryComparisonPredicate(_ImmutableModel):
+    op: BinaryComparisonOperator
     args: Tuple[ScalarExpression, ScalarExpression]
 
-    def __str__(self) -> str:
-        return f"{self.args[0]} {self.op} {self.args[1]}"
+    def _to_text(self) -> str:
+        return f"{_render(self.args[0])} {self.op} {_render(self.args[1])}"
 
 
-class IsLikePredicate(BaseModel):
+class IsLikePredicate(_ImmutableModel):
     op: Literal["like"]
     args: Tuple[CharacterExpression, PatternExpression]
 
-    def __str__(self) -> str:
-        return f"{self.args[0]} LIKE {self.args[1]}"
+    def _to_text(self) -> str:
+        return f"{_render(self.args[0])} LIKE {_render(self.args[1])}"
 
 
-class IsBetweenPredicate(BaseModel):
+class IsBetweenPredicate(_ImmutableModel):
     op: Literal["between"]
     args: Tuple[NumericExpression, NumericExpression, NumericExpression]
 
-    def __str__(self) -> str:
-        return f"{self.args[0]} BETWEEN {self.args[1]} AND {self.args[2]}"
+    def _to_text(self) -> str:
+        return "".join(
+            (
+                _render(self.args[0]),
+                " BETWEEN ",
+                _render(self.args[1]),
+                " AND ",
+                _render(self.args[2]),
+            )
+        )
 
 
-class IsInListPredicate(BaseModel):
+class IsInListPredicate(_ImmutableModel):
     op: Literal["in"]
-    args: Tuple[ScalarExpression, List[ScalarExpression]]
+    args: Tuple[ScalarExpression, Tuple[ScalarExpression, ...]]
 
-    def __str__(self) -> str:
-        return f"{self.args[0]} IN ({_join_list(self.args[1], ', ')})"
+    def _to_text(self) -> str:
+        return f"{_render(self.args[0])} IN ({_join_list(self.args[1], ', ', _render)})"
 
 
-class IsNullPredicate(BaseModel):
+class IsNullPredicate(_ImmutableModel):
     op: Literal["isNull"]
     args: Tuple[IsNullOperand]
 
-    def __str__(self) -> str:
-        return f"{self.args[0]} IS NULL"
+    def _to_text(self) -> str:
+        return f"{_render(self.args[0])} IS NULL"
 
 
 SpatialFunction = Literal[
@@ -90,12 +219,12 @@ SpatialFunction = Literal[
 ]
 
 
-class SpatialPredicate(BaseModel):
+class SpatialPredicate(_ImmutableModel):
     op: SpatialFunction
     args: Tuple[GeomExpression, GeomExpression]
 
-    def __str__(self) -> str:
-        return f"{self.op.upper()}({self.args[0]}, {self.args[1]})"
+    def _to_text(self) -> str:
+        return _render_call(_OP_UPPER[self.op], self.args[0], self.args[1])
 
 
 TemporalFunction = Literal[
@@ -117,26 +246,21 @@ TemporalFunction = Literal[
 ]
 
 
-class TemporalPredicate(BaseModel):
+class TemporalPredicate(_ImmutableModel):
     op: TemporalFunction
     args: Tuple[TemporalExpression, TemporalExpression]
 
-    def __str__(self) -> str:
-        return f"{self.op.upper()}({self.args[0]}, {self.args[1]})"
+    def _to_text(self) -> str:
+        return _render_call(_OP_UPPER[self.op], self.args[0], self.args[1])
 
 
 class Array(RootModel):
-    root: MutableSequence[ArrayElement]
-
-    def __str__(self) -> str:
-        return f"({_join_list(self.root, ', ')})"
+    model_config = ConfigDict(frozen=True)
 
-
-class ArrayExpression(RootModel):
-    root: Tuple[ArrayExpressionItems, ArrayExpressionItems]
+    root: Tuple[ArrayElement, ...]
 
     def __str__(self) -> str:
-        return f"({self.root[0]}, {self.root[1]})"
+        return f"({_join_list(self.root, ', ', _render)})"
 
 
 ArrayFunction = Literal[
@@ -147,284 +271,541 @@ ArrayFunction = Literal[
 ]
 
 
-class ArrayPredicate(BaseModel):
+class ArrayPredicate(_ImmutableModel):
     op: ArrayFunction
     args: ArrayExpression
 
-    def __str__(self) -> str:
-        return f"{self.op.upper()}{self.args}"
+    def _to_text(self) -> str:
+        return _render_call(_OP_UPPER[self.op], self.args[0], self.args[1])
 
 
 class BooleanExpression(RootModel):
-    root: BooleanExpressionItems
+    """The top level cql2 expression.
 
-    def __str__(self) -> str:
-        # If it's a bool, we uppercase it.
-        if isinstance(self.root, bool):
-            return str(self.root).upper()
-        # Otherwise, we return the string representation of the root.
-        return str(self.root)
+    Nested expressions are validated directly as `BooleanExpressionItems` rather
+    than being wrapped in another `BooleanExpression`.
+    """
 
+    root: BooleanExpressionItems
 
-BooleanExpressionList = Annotated[List[BooleanExpression], Field(min_length=2)]
+    def __str__(self) -> str:
+        return _render(self.root)
 
 
-class AndOrExpression(BaseModel):
+class AndOrExpression(_ImmutableModel):
     op: Literal["or", "and"]
-    args: BooleanExpressionList
+    # The length is constrained here rather than on the alias, as pydantic 2.5 fails
+    # to rebuild a model once a forward referenced alias containing `Field` resolves.
+    args: BooleanExpressionList = Field(min_length=2)
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         # May result in excessive parens, but guarantees correctness.
-        return f"({_join_list(self.args, f' {self.op.upper()} ')})"
+        return f"({_join_list(self.args, f' {_OP_UPPER[self.op]} ', _render)})"
+
 
+ArithmeticOperator = Literal["+", "-", "*", "/", "^", "%", "div"]
 
-class ArithmeticExpression(BaseModel):
-    op: Literal["+", "-", "*", "/", "^", "%", "div"]
+
+class ArithmeticExpression(_ImmutableModel):
+    op: ArithmeticOperator
     args: Tuple[ArithmeticOperandsItems, ArithmeticOperandsItems]
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         # May result in excessive parens, but guarantees correctness
-        return f"({self.args[0]} {self.op} {self.args[1]})"
+        return f"({_render(self.args[0])} {self.op} {_render(self.args[1])})"
 
 
-class Function(BaseModel):
+class Function(_ImmutableModel):
     name: StrictStr
     args: FunctionArguments = None
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         # If self.args, comma join them. Otherwise, empty string. Inside parens.
-        return f"{self.name}({_join_list(self.args, ', ') if self.args else ''})"
+        return (
+            f"{self.name}({_join_list(self.args, ', ', _render) if self.args else ''})"
+        )
 
 
-class FunctionRef(BaseModel):
+class FunctionRef(_ImmutableModel):
     function: Function
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         return str(self.function)
 
 
-class PropertyRef(BaseModel):
+@lru_cache(maxsize=1024)
+def _quote_property(name: str) -> str:
+    """Double quote a property name.
+
+    Queries tend to reference the same few properties repeatedly, so the quoted
+    names are cached and shared.
+    """
+    return f'"{name}"'
+
+
+class PropertyRef(_ImmutableModel):
     property: StrictStr
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         # The safest thing to do is always quote it.
-        return f'"{self.property}"'
+        return _quote_property(self.property)
 
 
-class DateInstant(BaseModel):
+class DateInstant(_ImmutableModel):
     date: date
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         return f"DATE('{self.date.isoformat()}')"
 
 
-class TimestampInstant(BaseModel):
+class TimestampInstant(_ImmutableModel):
     timestamp: datetime
 
-    def __str__(self) -> str:
-        # Use ISO format with `Z` at the end. Note: this will always include the
-        # microseconds, even if they are 0.
-        return f"TIMESTAMP('{self.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}')"
+    def _to_text(self) -> str:
+        return f"TIMESTAMP({_render_datetime(self.timestamp)})"
 
 
-class BboxLiteral(BaseModel):
+class BboxLiteral(_ImmutableModel):
     bbox: BBox
 
-    def __str__(self) -> str:
+    def _to_text(self) -> str:
         return f"BBOX{self.bbox}"
 
 
-class GeometryLiteral(RootModel):
-    root: Union[Geometry, GeometryCollection]
-
-    def __str__(self) -> str:
-        return self.root.wkt
-
+GeometryLiteral = Union[Geometry, GeometryCollection]
 
-class IntervalArrayItems(RootModel):
-    root: Union[datetime, date, Literal[".."], PropertyRef, FunctionRef]
 
-    def __str__(self) -> str:
-        # If it is a datetime, format it as iso with `Z` at the end. Note this will
-        # always include the microseconds, even if they are 0.
-        if isinstance(self.root, datetime):
-            return f"""'{self.root.strftime("%Y-%m-%dT%H:%M:%S.%fZ")}'"""
-        # If it is a date, format with built-in isoformat
-        if isinstance(self.root, date):
-            return f"'{self.root.isoformat()}'"
-        if self.root == "..":
-            return "'..'"
-        # Otherwise use the string representation of the root.
-        return str(self.root)
-
-
-class IntervalInstance(BaseModel):
+class IntervalInstance(_ImmutableModel):
     interval: Tuple[IntervalArrayItems, IntervalArrayItems]
 
-    def __str__(self) -> str:
-        return f"INTERVAL({self.interval[0]}, {self.interval[1]})"
+    def _to_text(self) -> str:
+        return _render_call("INTERVAL", self.interval[0], self.interval[1])
 
 
-# The easiest way to handle typing for `Casei` and `Accenti`, so far, has been
-# using a subclass for each `CharacterExpression` and `PatternExpression`.
-# Runtime typing on Generics has been problematic.
-class Casei(BaseModel):
+# A single model is used for `Casei` and `Accenti` within both a
+# `CharacterExpression` and a `PatternExpression`. A `PatternExpression` is a
+# subset of a `CharacterExpression`, so the args accept the latter and
+# `PatternExpression` checks them after validation.
+class Casei(_ImmutableModel):
     op: Literal["casei"]
-    args: Tuple[Union[CharacterExpression, PatternExpression]]
-
-    def __str__(self) -> str:
-        return f"CASEI({self.args[0]})"
-
-
-class CaseiCharacterExpression(Casei):
     args: Tuple[CharacterExpression]
 
+    def _to_text(self) -> str:
+        return f"CASEI({_render(self.args[0])})"
 
-class CaseiPatternExpression(Casei):
-    args: Tuple[PatternExpression]
 
-
-class Accenti(BaseModel):
+class Accenti(_ImmutableModel):
     op: Literal["accenti"]
-    args: Tuple[Union[CharacterExpression, PatternExpression]]
-
-    def __str__(self) -> str:
-        return f"ACCENTI({self.args[0]})"
-
-
-class AccentiCharacterExpression(Accenti):
     args: Tuple[CharacterExpression]
 
-
-class AccentiPatternExpression(Accenti):
-    args: Tuple[PatternExpression]
+    def _to_text(self) -> str:
+        return f"ACCENTI({_render(self.args[0])})"
+
+
+# Map each `op` to the tag of the model which handles it.
+_OP_TAGS: Dict[str, str] = {
+    "and": "AndOrExpression",
+    "or": "AndOrExpression",
+    "not": "NotExpression",
+    **dict.fromkeys(get_args(BinaryComparisonOperator), "BinaryComparisonPredicate"),
+    "like": "IsLikePredicate",
+    "between": "IsBetweenPredicate",
+    "in": "IsInListPredicate",
+    "isNull": "IsNullPredicate",
+    **dict.fromkeys(get_args(SpatialFunction), "SpatialPredicate"),
+    **dict.fromkeys(get_args(TemporalFunction), "TemporalPredicate"),
+    **dict.fromkeys(get_args(ArrayFunction), "ArrayPredicate"),
+    **dict.fromkeys(get_args(ArithmeticOperator), "ArithmeticExpression"),
+    "casei": "Casei",
+    "accenti": "Accenti",
+}
+# The cql2-text form of each `op` which is uppercased, computed once rather than
+# on every `__str__`.
+_OP_UPPER: Dict[str, str] = {
+    op: op.upper()
+    for op in (
+        "and",
+        "or",
+        *get_args(SpatialFunction),
+        *get_args(TemporalFunction),
+        *get_args(ArrayFunction),
+    )
+}
+# Models without an `op` are identified by their keys. The order matters, as
+# GeoJSON geometries may also include a `bbox`.
+_KEY_TAGS: Tuple[Tuple[str, str], ...] = (
+    ("property", "PropertyRef"),
+    ("function", "FunctionRef"),
+    ("date", "DateInstant"),
+    ("timestamp", "TimestampInstant"),
+    ("interval", "IntervalInstance"),
+    ("type", "GeometryLiteral"),
+    ("bbox", "BboxLiteral"),
+)
 
 
-class _CharLiteralRootModel(RootModel):
-    """Root Model used for anything which can contain a Character Literal.
+def _get_tag(value: Any) -> Optional[str]:
+    """Callable discriminator for the unions of cql2 expressions.
 
-    It will apply the quotes required while allowing it to stay a `str`.
+    Works on raw input as well as model instances, so pydantic can dispatch
+    directly to a single member of a union rather than trying each in turn.
     """
+    # `Array` is the only root model within the unions. A `BooleanExpression` from
+    # existing callers has its own tag, so it is unwrapped rather than revalidated.
+    if isinstance(value, Array):
+        return "Array"
+    if isinstance(value, BooleanExpression):
+        return "BooleanExpression"
+    if isinstance(value, BaseModel):
+        value = value.__dict__
+    if isinstance(value, dict):
+        op = value.get("op")
+        if op is not None:
+            return _OP_TAGS.get(op) if isinstance(op, str) else None
+        for key, tag in _KEY_TAGS:
+            if key in value:
+                return tag
+        return None
+    # bool is a subclass of int, so it must be checked first.
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, (list, tuple)):
+        return "Array"
+    return None
+
+
+def _unwrap_boolean_expression(value: BooleanExpression) -> Any:
+    """Validate a nested `BooleanExpression` as the expression it wraps.
+
+    Nested expressions are no longer wrapped in a `BooleanExpression`, but existing
+    callers may still pass one in.
+    """
+    return value.root
 
-    root: Any
-
-    def __str__(self) -> str:
-        # If root is a string, quote it to make it a Character Literal.
-        if isinstance(self.root, str):
-            return _make_char_literal(self.root)
-        # Otherwise, return the string representation of the root.
-        return str(self.root)
-
-
-class CharacterClause(_CharLiteralRootModel):
-    root: CharacterClauseItems
-
-
-class PatternExpression(_CharLiteralRootModel):
-    root: PatternExpressionItems
 
+def _check_pattern_expression(value: Any) -> Any:
+    """Check that `Casei` and `Accenti` only wrap a Character Literal in a pattern.
 
-ComparisonPredicate = Union[
-    BinaryComparisonPredicate,
-    IsLikePredicate,
-    IsBetweenPredicate,
-    IsInListPredicate,
-    IsNullPredicate,
+    They share a model with `CharacterExpression`, which also accepts properties and
+    functions, but a `PatternExpression` can only be a Character Literal.
+    """
+    arg = value
+    while isinstance(arg, (Casei, Accenti)):
+        arg = arg.args[0]
+    if not isinstance(arg, str):
+        raise PydanticCustomError(
+            "pattern_expression", "A pattern expression must be a character literal"
+        )
+    return value
+
+
+def _get_interval_tag(value: Any) -> Optional[str]:
+    """Callable discriminator for the items of an interval.
+
+    Strings are tagged by their shape, as a date is always `YYYY-MM-DD`. Otherwise
+    a date string would also be accepted as a datetime at midnight, while anything
+    else, such as a unix timestamp, is left to the datetime validation.
+    """
+    if isinstance(value, str):
+        if value == "..":
+            return ".."
+        if len(value) == 10 and value[4] == "-" and value[7] == "-":
+            return "date"
+        return "datetime"
+    # datetime is a subclass of date, so it must be checked first.
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, (dict, BaseModel)):
+        return _get_tag(value)
+    # Leave anything else, such as a unix timestamp, to the datetime validator.
+    return "datetime"
+
+
+# Without a custom error, invalid input only reports that no tag could be extracted
+# using the callable, which says nothing about what was wrong with it.
+_EXPRESSION_DISCRIMINATOR = Discriminator(
+    _get_tag,
+    custom_error_type="invalid_expression",
+    custom_error_message="Unknown op or expression shape",
+)
+_INTERVAL_DISCRIMINATOR = Discriminator(
+    _get_interval_tag,
+    custom_error_type="invalid_interval_item",
+    custom_error_message="Unknown interval item",
+)
+ComparisonPredicate = Annotated[
+    Union[
+        BinaryComparisonPredicate,
+        IsLikePredicate,
+        IsBetweenPredicate,
+        IsInListPredicate,
+        IsNullPredicate,
+    ],
+    Field(discriminator="op"),
 ]
-InstantInstance = Union[DateInstant, TimestampInstant]
-NumericExpression = Union[
-    ArithmeticExpression, StrictFloatOrInt, PropertyRef, FunctionRef
+InstantInstance = Annotated[
+    Union[
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-SpatialInstance = Union[GeometryLiteral, BboxLiteral]
-GeomExpression = Union[SpatialInstance, PropertyRef, FunctionRef]
-TemporalInstance = Union[InstantInstance, IntervalInstance]
-TemporalExpression = Union[TemporalInstance, PropertyRef, FunctionRef]
-TemporalInstantExpression = Union[InstantInstance, PropertyRef, FunctionRef]
-ScalarExpression = Union[
-    TemporalInstantExpression, BooleanExpression, CharacterClause, NumericExpression
+IntervalArrayItems = Annotated[
+    Union[
+        Annotated[datetime, Tag("datetime")],
+        Annotated[date, Tag("date")],
+        Annotated[Literal[".."], Tag("..")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _INTERVAL_DISCRIMINATOR,
 ]
-ArithmeticOperandsItems = Union[
-    ArithmeticExpression, PropertyRef, FunctionRef, StrictFloatOrInt
+NumericExpression = Annotated[
+    Union[
+        Annotated[ArithmeticExpression, Tag("ArithmeticExpression")],
+        Annotated[StrictFloatOrInt, Tag("number")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-ArrayExpressionItems = Union[Array, PropertyRef, FunctionRef]
-PatternExpressionItems = Union[
-    CaseiPatternExpression, AccentiPatternExpression, StrictStr
+SpatialInstance = Annotated[
+    Union[
+        Annotated[GeometryLiteral, Tag("GeometryLiteral")],
+        Annotated[BboxLiteral, Tag("BboxLiteral")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-CharacterClauseItems = Union[
-    CaseiCharacterExpression,
-    AccentiCharacterExpression,
-    StrictStr,
+GeomExpression = Annotated[
+    Union[
+        Annotated[GeometryLiteral, Tag("GeometryLiteral")],
+        Annotated[BboxLiteral, Tag("BboxLiteral")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-CharacterExpression = Union[
-    CharacterClause,
-    PropertyRef,
-    FunctionRef,
+TemporalInstance = Annotated[
+    Union[
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[IntervalInstance, Tag("IntervalInstance")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-
-# Extra types to match the cql2-text grammar better.
-IsNullOperand = Union[
-    CharacterClause,
-    NumericExpression,
-    TemporalExpression,
-    BooleanExpression,
-    GeomExpression,
+TemporalExpression = Annotated[
+    Union[
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[IntervalInstance, Tag("IntervalInstance")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+TemporalInstantExpression = Annotated[
+    Union[
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+ArithmeticOperandsItems = Annotated[
+    Union[
+        Annotated[ArithmeticExpression, Tag("ArithmeticExpression")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+        Annotated[StrictFloatOrInt, Tag("number")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+ArrayExpressionItems = Annotated[
+    Union[
+        Annotated[Array, Tag("Array")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+ArrayExpression = Tuple[ArrayExpressionItems, ArrayExpressionItems]
+PatternExpression = Annotated[
+    Union[
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+    AfterValidator(_check_pattern_expression),
+]
+CharacterClause = Annotated[
+    Union[
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+CharacterExpression = Annotated[
+    Union[
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-ArrayElement = Union[
-    CharacterClause,
-    NumericExpression,
+# Only selected for `BooleanExpression` instances, never for raw input.
+_NestedBooleanExpression = Annotated[
     BooleanExpression,
-    GeomExpression,
-    TemporalExpression,
-    Array,
+    AfterValidator(_unwrap_boolean_expression),
+    Tag("BooleanExpression"),
+]
+BooleanExpressionItems = Annotated[
+    Union[
+        Annotated[AndOrExpression, Tag("AndOrExpression")],
+        Annotated[NotExpression, Tag("NotExpression")],
+        Annotated[BinaryComparisonPredicate, Tag("BinaryComparisonPredicate")],
+        Annotated[IsLikePredicate, Tag("IsLikePredicate")],
+        Annotated[IsBetweenPredicate, Tag("IsBetweenPredicate")],
+        Annotated[IsInListPredicate, Tag("IsInListPredicate")],
+        Annotated[IsNullPredicate, Tag("IsNullPredicate")],
+        Annotated[SpatialPredicate, Tag("SpatialPredicate")],
+        Annotated[TemporalPredicate, Tag("TemporalPredicate")],
+        Annotated[ArrayPredicate, Tag("ArrayPredicate")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+        Annotated[StrictBool, Tag("bool")],
+        _NestedBooleanExpression,
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+BooleanExpressionList = Tuple[BooleanExpressionItems, ...]
+# The remaining unions are flattened out of the ones above, so every member
+# has a single tag and pydantic does not need to try nested unions in turn.
+ScalarExpression = Annotated[
+    Union[
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[AndOrExpression, Tag("AndOrExpression")],
+        Annotated[NotExpression, Tag("NotExpression")],
+        Annotated[BinaryComparisonPredicate, Tag("BinaryComparisonPredicate")],
+        Annotated[IsLikePredicate, Tag("IsLikePredicate")],
+        Annotated[IsBetweenPredicate, Tag("IsBetweenPredicate")],
+        Annotated[IsInListPredicate, Tag("IsInListPredicate")],
+        Annotated[IsNullPredicate, Tag("IsNullPredicate")],
+        Annotated[SpatialPredicate, Tag("SpatialPredicate")],
+        Annotated[TemporalPredicate, Tag("TemporalPredicate")],
+        Annotated[ArrayPredicate, Tag("ArrayPredicate")],
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+        Annotated[ArithmeticExpression, Tag("ArithmeticExpression")],
+        Annotated[StrictFloatOrInt, Tag("number")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+        Annotated[StrictBool, Tag("bool")],
+        _NestedBooleanExpression,
+    ],
+    _EXPRESSION_DISCRIMINATOR,
+]
+
+# Extra types to match the cql2-text grammar better.
+IsNullOperand = Annotated[
+    Union[
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+        Annotated[ArithmeticExpression, Tag("ArithmeticExpression")],
+        Annotated[StrictFloatOrInt, Tag("number")],
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[IntervalInstance, Tag("IntervalInstance")],
+        Annotated[AndOrExpression, Tag("AndOrExpression")],
+        Annotated[NotExpression, Tag("NotExpression")],
+        Annotated[BinaryComparisonPredicate, Tag("BinaryComparisonPredicate")],
+        Annotated[IsLikePredicate, Tag("IsLikePredicate")],
+        Annotated[IsBetweenPredicate, Tag("IsBetweenPredicate")],
+        Annotated[IsInListPredicate, Tag("IsInListPredicate")],
+        Annotated[IsNullPredicate, Tag("IsNullPredicate")],
+        Annotated[SpatialPredicate, Tag("SpatialPredicate")],
+        Annotated[TemporalPredicate, Tag("TemporalPredicate")],
+        Annotated[ArrayPredicate, Tag("ArrayPredicate")],
+        Annotated[GeometryLiteral, Tag("GeometryLiteral")],
+        Annotated[BboxLiteral, Tag("BboxLiteral")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+        Annotated[StrictBool, Tag("bool")],
+        _NestedBooleanExpression,
+    ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-FunctionArguments = Union[
-    None,
-    List[
-        Union[
-            CharacterClause,
-            NumericExpression,
-            BooleanExpression,
-            GeomExpression,
-            TemporalExpression,
-            Array,
-        ]
+ArrayElement = Annotated[
+    Union[
+        Annotated[Casei, Tag("Casei")],
+        Annotated[Accenti, Tag("Accenti")],
+        Annotated[StrictStr, Tag("str")],
+        Annotated[ArithmeticExpression, Tag("ArithmeticExpression")],
+        Annotated[StrictFloatOrInt, Tag("number")],
+        Annotated[AndOrExpression, Tag("AndOrExpression")],
+        Annotated[NotExpression, Tag("NotExpression")],
+        Annotated[BinaryComparisonPredicate, Tag("BinaryComparisonPredicate")],
+        Annotated[IsLikePredicate, Tag("IsLikePredicate")],
+        Annotated[IsBetweenPredicate, Tag("IsBetweenPredicate")],
+        Annotated[IsInListPredicate, Tag("IsInListPredicate")],
+        Annotated[IsNullPredicate, Tag("IsNullPredicate")],
+        Annotated[SpatialPredicate, Tag("SpatialPredicate")],
+        Annotated[TemporalPredicate, Tag("TemporalPredicate")],
+        Annotated[ArrayPredicate, Tag("ArrayPredicate")],
+        Annotated[GeometryLiteral, Tag("GeometryLiteral")],
+        Annotated[BboxLiteral, Tag("BboxLiteral")],
+        Annotated[DateInstant, Tag("DateInstant")],
+        Annotated[TimestampInstant, Tag("TimestampInstant")],
+        Annotated[IntervalInstance, Tag("IntervalInstance")],
+        Annotated[Array, Tag("Array")],
+        Annotated[PropertyRef, Tag("PropertyRef")],
+        Annotated[FunctionRef, Tag("FunctionRef")],
+        Annotated[StrictBool, Tag("bool")],
+        _NestedBooleanExpression,
     ],
+    _EXPRESSION_DISCRIMINATOR,
 ]
-BooleanExpressionItems = Union[
+FunctionArguments = Optional[Tuple[ArrayElement, ...]]
+
+# Update all the forward references. The namespace is collected once and shared,
+# rather than each rebuild inspecting the calling frame for it.
+_types_namespace = dict(globals())
+for _model in (
+    Accenti,
     AndOrExpression,
+    ArithmeticExpression,
+    Array,
+    ArrayPredicate,
+    BboxLiteral,
+    BinaryComparisonPredicate,
+    BooleanExpression,
+    Casei,
+    DateInstant,
+    Function,
+    FunctionRef,
+    IntervalInstance,
+    IsBetweenPredicate,
+    IsInListPredicate,
+    IsLikePredicate,
+    IsNullPredicate,
     NotExpression,
-    ComparisonPredicate,
+    PropertyRef,
     SpatialPredicate,
     TemporalPredicate,
-    ArrayPredicate,
-    FunctionRef,
-    StrictBool,
-]
-
-# Update all the forward references
-AccentiCharacterExpression.model_rebuild()
-AccentiPatternExpression.model_rebuild()
-AndOrExpression.model_rebuild()
-ArithmeticExpression.model_rebuild()
-ArrayExpression.model_rebuild()
-ArrayPredicate.model_rebuild()
-BboxLiteral.model_rebuild()
-BinaryComparisonPredicate.model_rebuild()
-BooleanExpression.model_rebuild()
-CaseiCharacterExpression.model_rebuild()
-CaseiPatternExpression.model_rebuild()
-CharacterClause.model_rebuild()
-DateInstant.model_rebuild()
-Function.model_rebuild()
-FunctionRef.model_rebuild()
-IntervalInstance.model_rebuild()
-IsBetweenPredicate.model_rebuild()
-IsInListPredicate.model_rebuild()
-IsLikePredicate.model_rebuild()
-IsNullPredicate.model_rebuild()
-NotExpression.model_rebuild()
-PatternExpression.model_rebuild()
-PropertyRef.model_rebuild()
-SpatialPredicate.model_rebuild()
-TemporalPredicate.model_rebuild()
-TimestampInstant.model_rebuild()
+    TimestampInstant,
+):
+    _model.model_rebuild(_types_namespace=_types_namespace)
+    if issubclass(_model, _ImmutableModel):
+        _RENDERERS[_model] = attrgetter("_text")
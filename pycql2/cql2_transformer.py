@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timezone
-from typing import Any, List, Literal, Union, cast
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Tuple, Union, cast, get_args
 
 from geojson_pydantic import (
     GeometryCollection,
@@ -25,14 +26,12 @@ from geojson_pydantic.types import (
 from lark import Lark, Transformer, v_args
 
 from pycql2.cql2_pydantic import (
-    AccentiCharacterExpression,
-    AccentiPatternExpression,
+    Accenti,
     AndOrExpression,
     ArithmeticExpression,
     ArithmeticOperandsItems,
     Array,
     ArrayElement,
-    ArrayExpression,
     ArrayExpressionItems,
     ArrayFunction,
     ArrayPredicate,
@@ -40,8 +39,7 @@ from pycql2.cql2_pydantic import (
     BinaryComparisonPredicate,
     BooleanExpression,
     BooleanExpressionItems,
-    CaseiCharacterExpression,
-    CaseiPatternExpression,
+    Casei,
     CharacterExpression,
     DateInstant,
     Function,
@@ -70,11 +68,10 @@ from pycql2.cql2_pydantic import (
 )
 from pycql2.utils import _clean_char_literal
 
-BooleanExpressionOrItems = Union[BooleanExpression, BooleanExpressionItems]
 Predicate = Union[
     BinaryComparisonPredicate, SpatialPredicate, TemporalPredicate, ArrayPredicate
 ]
-BooleanPrimary = Union[Predicate, bool, BooleanExpression]
+BooleanPrimary = Union[Predicate, bool, BooleanExpressionItems]
 BooleanFactor = Union[BooleanPrimary, NotExpression]
 BooleanTerm: Union[BooleanFactor, AndOrExpression]
 
@@ -88,11 +85,45 @@ def _passthrough(_self: Cql2Transformer, args: Any) -> Any:
     return args
 
 
-def _make_boolean_expression(arg: BooleanExpressionOrItems) -> BooleanExpression:
-    """Ensure arg is a BooleanExpression."""
-    if not isinstance(arg, BooleanExpression):
-        arg = BooleanExpression(root=arg)
-    return arg
+def _flatten(
+    op: Literal["or", "and"], items: List[BooleanExpressionItems]
+) -> Tuple[BooleanExpressionItems, ...]:
+    """Merge the args of any nested `AndOrExpression` with the same op.
+
+    Parenthesized groups such as `(a OR b) OR c` would otherwise be nested, but
+    `and` / `or` are associative so they can be represented as `a OR b OR c`.
+    """
+    flattened: List[BooleanExpressionItems] = []
+    for item in items:
+        if isinstance(item, AndOrExpression) and item.op == op:
+            flattened.extend(item.args)
+        else:
+            flattened.append(item)
+    return tuple(flattened)
+
+
+@lru_cache(maxsize=1024)
+def _property_ref(name: str) -> PropertyRef:
+    """Create a `PropertyRef` for a property name.
+
+    Queries tend to reference the same few properties repeatedly. The models are
+    frozen, so a single instance can be shared, along with its cached text.
+    """
+    return PropertyRef(property=name)
+
+
+# Function names are case insensitive in the text, but some json ops are camel case
+# such as `t_metBy`. Map the lower case names to each op once, rather than fixing
+# the case on every predicate.
+_SPATIAL_FUNCTIONS: Dict[str, SpatialFunction] = {
+    op.lower(): op for op in get_args(SpatialFunction)
+}
+_TEMPORAL_FUNCTIONS: Dict[str, TemporalFunction] = {
+    op.lower(): op for op in get_args(TemporalFunction)
+}
+_ARRAY_FUNCTIONS: Dict[str, ArrayFunction] = {
+    op.lower(): op for op in get_args(ArrayFunction)
+}
 
 
 class Cql2Transformer(Transformer):
@@ -103,14 +134,15 @@ class Cql2Transformer(Transformer):
 
     @v_args(inline=True)
     def BOOLEAN_LITERAL(self, boolean_literal: str) -> bool:
-        # Text is case insensitive, so upper it and compare with "TRUE"
-        return boolean_literal.upper() == "TRUE"
+        # Text is case insensitive, but the grammar only allows "TRUE" or "FALSE". So
+        # the first character is enough, without creating an upper cased copy.
+        return boolean_literal[0] in "Tt"
 
     # Since we are using `?` in the grammar it will pass through single items
     # and we want to ensure that the output is always a `BooleanExpression`.
     @v_args(inline=True)
-    def start(self, expression: BooleanExpressionOrItems) -> BooleanExpression:
-        return _make_boolean_expression(expression)
+    def start(self, expression: BooleanExpressionItems) -> BooleanExpression:
+        return BooleanExpression(root=expression)
 
     # All contiguous blocks of `or` / `and` are grouped together into single
     # AndOrExpression.
@@ -122,26 +154,21 @@ class Cql2Transformer(Transformer):
     # handle it was put the final `BooleanExpression` logic in the `start` function.
 
     def boolean_expression(
-        self, boolean_terms: List[BooleanExpressionOrItems]
+        self, boolean_terms: List[BooleanExpressionItems]
     ) -> AndOrExpression:
         # The List will always have at least two items, if it doesn't then the
         # parser will pass it up to `start`
-        return AndOrExpression(
-            op="or", args=[_make_boolean_expression(t) for t in boolean_terms]
-        )
+        return AndOrExpression(op="or", args=_flatten("or", boolean_terms))
 
     def boolean_term(
-        self, boolean_factors: List[BooleanExpressionOrItems]
+        self, boolean_factors: List[BooleanExpressionItems]
     ) -> AndOrExpression:
         # The List will always have at least two items, if it doesn't then the
         # parser will pass it up to `boolean_expression`
-        return AndOrExpression(
-            op="and", args=[_make_boolean_expression(f) for f in boolean_factors]
-        )
+        return AndOrExpression(op="and", args=_flatten("and", boolean_factors))
 
     @v_args(inline=True)
     def not_(self, boolean_primary: BooleanPrimary) -> NotExpression:
-        boolean_primary = _make_boolean_expression(boolean_primary)
         return NotExpression(op="not", args=(boolean_primary,))
 
     # Comparison Predicate
@@ -192,7 +219,7 @@ class Cql2Transformer(Transformer):
     def not_like(self, e1: CharacterExpression, e2: PatternExpression) -> NotExpression:
         return NotExpression(
             op="not",
-            args=(BooleanExpression(root=IsLikePredicate(op="like", args=(e1, e2))),),
+            args=(IsLikePredicate(op="like", args=(e1, e2)),),
         )
 
     # Between Predicate
@@ -209,11 +236,7 @@ class Cql2Transformer(Transformer):
     ) -> NotExpression:
         return NotExpression(
             op="not",
-            args=(
-                BooleanExpression(
-                    root=IsBetweenPredicate(op="between", args=(e1, e2, e3))
-                ),
-            ),
+            args=(IsBetweenPredicate(op="between", args=(e1, e2, e3)),),
         )
 
     # In List Predicate
@@ -224,7 +247,7 @@ class Cql2Transformer(Transformer):
     def in_list(
         self, scalar_expression: ScalarExpression, list_values: List[ScalarExpression]
     ) -> IsInListPredicate:
-        return IsInListPredicate(op="in", args=(scalar_expression, list_values))
+        return IsInListPredicate(op="in", args=(scalar_expression, tuple(list_values)))
 
     @v_args(inline=True)
     def not_in_list(
@@ -233,10 +256,8 @@ class Cql2Transformer(Transformer):
         return NotExpression(
             op="not",
             args=(
-                BooleanExpression(
-                    root=IsInListPredicate(
-                        op="in", args=(scalar_expression, list_values[0])
-                    )
+                IsInListPredicate(
+                    op="in", args=(scalar_expression, tuple(list_values[0]))
                 ),
             ),
         )
@@ -251,51 +272,45 @@ class Cql2Transformer(Transformer):
     def is_not_null(self, is_null_operand: IsNullOperand) -> NotExpression:
         return NotExpression(
             op="not",
-            args=(
-                BooleanExpression(
-                    root=IsNullPredicate(op="isNull", args=(is_null_operand,))
-                ),
-            ),
+            args=(IsNullPredicate(op="isNull", args=(is_null_operand,)),),
         )
 
     # Spatial Predicate
 
+    def SPATIAL_FUNCTION(self, spatial_function: str) -> SpatialFunction:
+        return _SPATIAL_FUNCTIONS[spatial_function.lower()]
+
     @v_args(inline=True)
     def spatial_predicate(
-        self, spatial_function: str, e1: GeomExpression, e2: GeomExpression
+        self, op: SpatialFunction, e1: GeomExpression, e2: GeomExpression
     ) -> SpatialPredicate:
-        op = cast(SpatialFunction, spatial_function.lower())
         return SpatialPredicate(op=op, args=(e1, e2))
 
     # Temporal Predicate
 
+    def TEMPORAL_FUNCTION(self, temporal_function: str) -> TemporalFunction:
+        return _TEMPORAL_FUNCTIONS[temporal_function.lower()]
+
     @v_args(inline=True)
     def temporal_predicate(
-        self, temporal_function: str, e1: TemporalExpression, e2: TemporalExpression
+        self, op: TemporalFunction, e1: TemporalExpression, e2: TemporalExpression
     ) -> TemporalPredicate:
-        op = temporal_function.lower()
-        # Special case for any operation that ends with `by`
-        if op.endswith("by"):
-            op = op[:-2] + "By"
-        op = cast(TemporalFunction, op)
         return TemporalPredicate(op=op, args=(e1, e2))
 
     # Array Predicate
 
     @v_args(inline=True)
     def array(self, *array_elements: ArrayElement) -> Array:
-        return Array(root=list(array_elements))
+        return Array(root=array_elements)
+
+    def ARRAY_FUNCTION(self, array_function: str) -> ArrayFunction:
+        return _ARRAY_FUNCTIONS[array_function.lower()]
 
     @v_args(inline=True)
     def array_predicate(
-        self, array_function: str, e1: ArrayExpressionItems, e2: ArrayExpressionItems
+        self, op: ArrayFunction, e1: ArrayExpressionItems, e2: ArrayExpressionItems
     ) -> ArrayPredicate:
-        op = array_function.lower()
-        # Special case for any operation that ends with `by`
-        if op.endswith("by"):
-            op = op[:-2] + "By"
-        op = cast(ArrayFunction, op)
-        return ArrayPredicate(op=op, args=ArrayExpression(root=(e1, e2)))
+        return ArrayPredicate(op=op, args=(e1, e2))
 
     # Arithmetic
 
@@ -344,11 +359,15 @@ class Cql2Transformer(Transformer):
     @v_args(inline=True)
     def negative(
         self, arithmetic_operand: Union[StrictFloatOrInt, PropertyRef, FunctionRef]
-    ) -> ArithmeticExpression:
+    ) -> Union[StrictFloatOrInt, ArithmeticExpression]:
         # `arithmetic_factor` only allows negative on `arithmetic_operand` as defined
         # in the bnf, which does not include `arithmetic_expression`.  So we cannot use
         # `ArithmeticOperandsItems` here.
 
+        # A negative number can simply be negated, the same as a signed number.
+        if isinstance(arithmetic_operand, (int, float)):
+            return -arithmetic_operand
+
         # There is not a specific json representation of `negative`, so this seems
         # like the simplest way to represent the same thing.
         return ArithmeticExpression(op="*", args=(-1, arithmetic_operand))
@@ -371,41 +390,42 @@ class Cql2Transformer(Transformer):
     @v_args(inline=True)
     def property_name(self, property_name: str) -> PropertyRef:
         # Strip `"` off property names if they exist.
-        return PropertyRef(property=property_name.strip('"'))
+        return _property_ref(property_name.strip('"'))
 
     @v_args(inline=True)
     def casei_pattern(
         self,
         expression: PatternExpression,
-    ) -> CaseiPatternExpression:
-        return CaseiPatternExpression(op="casei", args=(expression,))
+    ) -> Casei:
+        return Casei(op="casei", args=(expression,))
 
     @v_args(inline=True)
     def casei_character(
         self,
         expression: CharacterExpression,
-    ) -> CaseiCharacterExpression:
-        return CaseiCharacterExpression(op="casei", args=(expression,))
+    ) -> Casei:
+        return Casei(op="casei", args=(expression,))
 
     @v_args(inline=True)
     def accenti_pattern(
         self,
         expression: PatternExpression,
-    ) -> AccentiPatternExpression:
-        return AccentiPatternExpression(op="accenti", args=(expression,))
+    ) -> Accenti:
+        return Accenti(op="accenti", args=(expression,))
 
     @v_args(inline=True)
     def accenti_character(
         self,
         expression: CharacterExpression,
-    ) -> AccentiCharacterExpression:
-        return AccentiCharacterExpression(op="accenti", args=(expression,))
+    ) -> Accenti:
+        return Accenti(op="accenti", args=(expression,))
 
     # Spatial Definitions
 
     def coordinate(self, coordinate: List[float]) -> Position:
-        # We know coordinate will always be 2 or 3 elements, so we can just cast it
-        return cast(Position, tuple(coordinate))
+        # We know coordinate will always be 2 or 3 elements, so we can just cast it.
+        # The geometry models validate it into a `Position` tuple either way.
+        return cast(Position, coordinate)
 
     # Need this inline or point coordinates would be nested too deep. This will be
     # a `Position`
@@ -465,22 +485,32 @@ class Cql2Transformer(Transformer):
     # Date and Time Definitions
 
     def DATE(self, datestring: str) -> date:
-        # Simple `strptime` can be used to parse the date.
-        return datetime.strptime(datestring, "%Y-%m-%d").date()
+        # The grammar guarantees `YYYY-MM-DD`, so the parts can be sliced out directly
+        # rather than parsed with `strptime`. Invalid values still raise ValueError.
+        return date(int(datestring[0:4]), int(datestring[5:7]), int(datestring[8:10]))
 
     def DATE_TIME(self, datetimestring: str) -> datetime:
-        # Do some processing to account for optional decimal seconds within the text.
-
-        # Remove the `Z` that is always at the end of the string.
-        datetimestring = datetimestring[:-1]
-        # Look for a `.` to determine if optional fractional seconds were included.
-        if "." not in datetimestring:
-            # Add a `.0` to the end if they were not included
-            datetimestring = datetimestring + ".0"
-        # Now a single `strptime` can be used to parse the input. It is always Z, so
-        # timezone needs to be set to UTC.
-        return datetime.strptime(datetimestring, "%Y-%m-%dT%H:%M:%S.%f").replace(
-            tzinfo=timezone.utc
+        # The grammar guarantees `YYYY-MM-DDTHH:MM:SS[.f+]Z`, so the parts can be
+        # sliced out directly rather than parsed with `strptime`.
+
+        # Optional fractional seconds are between the seconds and the `Z` which is
+        # always at the end of the string. They are right padded to microseconds.
+        fraction = datetimestring[20:-1]
+        # The grammar allows any number of digits, but like `strptime` more than
+        # microseconds are rejected rather than silently truncated.
+        if len(fraction) > 6:
+            msg = f"More than 6 fractional seconds digits: {datetimestring}"
+            raise ValueError(msg)
+        # It is always Z, so timezone needs to be set to UTC.
+        return datetime(
+            int(datetimestring[0:4]),
+            int(datetimestring[5:7]),
+            int(datetimestring[8:10]),
+            int(datetimestring[11:13]),
+            int(datetimestring[14:16]),
+            int(datetimestring[17:19]),
+            int(fraction.ljust(6, "0")) if fraction else 0,
+            tzinfo=timezone.utc,
         )
 
     @v_args(inline=True)
@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import Any, Callable, Sequence
 
 QUOTE = "'"
 QUOTE_QUOTE = "''"
@@ -11,7 +11,10 @@ def _make_char_literal(characters: str) -> str:
     Adds single quotes `'` around string.
     Escapes any single quotes with backslash `\'`.
     """
-    return f"'{characters.replace(QUOTE, BACKSLASH_QUOTE)}'"
+    # Most strings contain no quotes, and checking is cheaper than replacing.
+    if QUOTE in characters:
+        return f"'{characters.replace(QUOTE, BACKSLASH_QUOTE)}'"
+    return f"'{characters}'"
 
 
 def _clean_char_literal(characters: str) -> str:
@@ -22,9 +25,16 @@ def _clean_char_literal(characters: str) -> str:
 
     Based on the grammar, we know the first and last characters are single quotes `'`.
     """
-    return characters[1:-1].replace(QUOTE_QUOTE, QUOTE).replace(BACKSLASH_QUOTE, QUOTE)
+    characters = characters[1:-1]
+    # Both escapes include a single quote, so without one there is nothing to do.
+    if QUOTE not in characters:
+        return characters
+    return characters.replace(QUOTE_QUOTE, QUOTE).replace(BACKSLASH_QUOTE, QUOTE)
 
 
-def _join_list(items: Sequence, sep: str) -> str:
-    """Join string of each item with sep."""
-    return sep.join(str(item) for item in items)
+def _join_list(items: Sequence, sep: str, fmt: Callable[[Any], str] = str) -> str:
+    """Join string of each item with sep.
+
+    Each item is converted to a string with `fmt`, which defaults to `str`.
+    """
+    return sep.join(map(fmt, items))
@@ -1,10 +1,21 @@
+import json
+from datetime import date, datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
 import pytest
 from lark import UnexpectedCharacters
+from lark.exceptions import VisitError
 from pydantic import ValidationError
 
-from pycql2.cql2_pydantic import BooleanExpression
+from pycql2.cql2_pydantic import (
+    Array,
+    BooleanExpression,
+    IntervalInstance,
+    NotExpression,
+    PropertyRef,
+    TimestampInstant,
+)
 from pycql2.cql2_transformer import parser, transformer
 
 JSON_DIR = Path("tests/data/json")
@@ -17,6 +28,10 @@ BAD_TEXT_DIR = Path("tests/bad_data/text")
 bad_json_files = sorted(_.name for _ in BAD_JSON_DIR.glob("*.json"))
 bad_text_files = sorted(_.name for _ in BAD_TEXT_DIR.glob("*.txt"))
 
+# Parsing is the slowest part of the tests, and each text file is parsed by both
+# `test_parse_text` and `test_text_to_json`. Cache on the text so each is parsed once.
+cached_parse = lru_cache(maxsize=None)(parser.parse)
+
 
 @pytest.mark.parametrize("file_name", json_files)
 def test_parse_json(file_name: str) -> None:
@@ -31,7 +46,7 @@ def test_parse_text(file_name: str) -> None:
     """Test that the parser can parse the text."""
 
     text_file = TEXT_DIR / file_name
-    _ = parser.parse(text_file.read_text())
+    _ = cached_parse(text_file.read_text())
 
 
 @pytest.mark.parametrize("file_name", bad_json_files)
@@ -45,11 +60,12 @@ def test_parse_bad_json(file_name: str) -> None:
 
 @pytest.mark.parametrize("file_name", bad_text_files)
 def test_parse_bad_text(file_name: str) -> None:
-    """Test that the parser does not parse the bad text."""
+    """Test that the bad text is rejected by the parser or the transformer."""
 
     text_file = BAD_TEXT_DIR / file_name
-    with pytest.raises(UnexpectedCharacters):
-        _ = parser.parse(text_file.read_text())
+    # Some text is valid per the grammar, but its values are not.
+    with pytest.raises((UnexpectedCharacters, VisitError)):
+        _ = transformer.transform(parser.parse(text_file.read_text()))
 
 
 @pytest.mark.parametrize("file_name", json_files)
@@ -72,7 +88,7 @@ def test_text_to_json(file_name: str) -> None:
 
     text_file = TEXT_DIR / file_name
     # Load the text data
-    tree = parser.parse(text_file.read_text())
+    tree = cached_parse(text_file.read_text())
     output = transformer.transform(tree)
     # Some text files are equivalent to the same json file. These contain
     # "-alt" in the file names. We split on the "-" to get the base name.
@@ -81,3 +97,103 @@ def test_text_to_json(file_name: str) -> None:
     expected = BooleanExpression.model_validate_json(json_file.read_text())
     # Compare the two
     assert output == expected
+
+
+def test_nested_boolean_expression() -> None:
+    """Test that a nested `BooleanExpression` is validated as the expression it wraps."""
+
+    inner = BooleanExpression.model_validate(
+        {"op": "=", "args": [{"property": "a"}, 1]}
+    )
+    model = NotExpression(op="not", args=(inner,))
+    assert model.args[0] == inner.root
+    assert str(model) == 'NOT "a" = 1'
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("file_name", json_files)
+def test_text_cache_is_hidden(file_name: str) -> None:
+    """Test that rendering a model does not change how it dumps or compares."""
+
+    json_text = (JSON_DIR / file_name).read_text()
+    model = BooleanExpression.model_validate_json(json_text)
+    expected = BooleanExpression.model_validate_json(json_text)
+    dumped = model.model_dump_json()
+    dumped_python = model.model_dump(mode="json")
+    _ = str(model)
+    assert model.model_dump_json() == dumped
+    assert model.model_dump(mode="json") == dumped_python
+    assert model == expected
+
+
+def test_text_cache_keeps_hash() -> None:
+    """Test that rendering a model does not change its hash."""
+
+    model = PropertyRef(property="a")
+    expected = hash(model)
+    assert str(model) == '"a"'
+    assert hash(model) == expected
+    assert model == PropertyRef(property="a")
+
+
+def test_sequences_are_immutable() -> None:
+    """Test that lists are validated as tuples, so cached text cannot go stale."""
+
+    data = {"op": "in", "args": [{"property": "a"}, [1, 2]]}
+    model = BooleanExpression.model_validate(data)
+    assert str(model) == '"a" IN (1, 2)'
+    assert model.root.args[1] == (1, 2)
+    array = Array.model_validate([1, 2])
+    with pytest.raises(ValidationError):
+        array.root = (3,)
+
+
+def test_model_copy_updates_text() -> None:
+    """Test that updating a copy does not reuse the cached text of the original."""
+
+    model = PropertyRef(property="a")
+    assert str(model) == '"a"'
+    copied = model.model_copy(update={"property": "b"})
+    assert str(copied) == '"b"'
+    assert str(model) == '"a"'
+
+
+def test_interval_date_strings() -> None:
+    """Test that date strings in an interval are dates in python and json mode."""
+
+    data = {"interval": ["2005-01-10", "2010-02-10T00:00:00Z"]}
+    expected = "INTERVAL('2005-01-10', '2010-02-10T00:00:00.000000Z')"
+    assert str(IntervalInstance.model_validate(data)) == expected
+    assert str(IntervalInstance.model_validate_json(json.dumps(data))) == expected
+    # A unix timestamp has the same length as a date but is a datetime.
+    interval = IntervalInstance.model_validate({"interval": ["1234567890", ".."]})
+    assert interval.interval[0] == datetime(
+        2009, 2, 13, 23, 31, 30, tzinfo=timezone.utc
+    )
+
+
+class _SubclassedDate(date):
+    pass
+
+
+class _SubclassedDatetime(datetime):
+    pass
+
+
+def test_date_subclasses() -> None:
+    """Test that subclasses of date and datetime render the same as the base types."""
+
+    interval = IntervalInstance(
+        interval=(_SubclassedDate(2020, 1, 1), _SubclassedDatetime(2021, 1, 1))
+    )
+    expected = "INTERVAL('2020-01-01', '2021-01-01T00:00:00.000000Z')"
+    assert str(interval) == expected
+    timestamp = TimestampInstant(timestamp=_SubclassedDatetime(2020, 1, 1))
+    assert str(timestamp) == "TIMESTAMP('2020-01-01T00:00:00.000000Z')"
+
+
+def test_unknown_op_error() -> None:
+    """Test that an unknown op reports what was wrong with the expression."""
+
+    with pytest.raises(ValidationError, match="Unknown op or expression shape"):
+        BooleanExpression.model_validate({"op": "nope", "args": []})
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from hypothesis import HealthCheck, given, settings, strategies as st
 from hypothesis.extra.lark import LarkStrategy
@@ -9,6 +9,15 @@ from pycql2.cql2_pydantic import _join_list
 from pycql2.cql2_transformer import parser, transformer
 
 
+def _format_ring(coordinates: List[Tuple[float, float]]) -> str:
+    """Format coordinates as a closed ring, by repeating the first coordinate."""
+    return f"({_join_list([*coordinates, coordinates[0]], ',', _format_coordinate)})"
+
+
+def _format_coordinate(coordinate: Tuple[float, float]) -> str:
+    return f"{coordinate[0]} {coordinate[1]}"
+
+
 class SpacedLarkStrategy(LarkStrategy):
     def __init__(
         self,
@@ -39,17 +48,14 @@ class SpacedLarkStrategy(LarkStrategy):
                         st.floats(min_value=-90, max_value=90),
                     ),
                     min_size=3,
-                )
-                .map(lambda x: [*x, x[0]])
-                .map(lambda x: _join_list([_join_list(c, " ") for c in x], ","))
-                .map(lambda x: f"({x})")
+                ).map(_format_ring)
             ),
             # The grammar just uses DIGIT throughout but we need to make sure that the
             # date and datetime are valid so we need to use the built-in strategies
             # for those and then format them to match the grammar.
             "DATE": st.dates().map(lambda x: x.isoformat()),
             "DATE_TIME": st.datetimes().map(
-                lambda x: x.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+                lambda x: f"{x.isoformat(timespec='microseconds')}Z"
             ),
         }
 